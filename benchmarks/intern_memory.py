@@ -0,0 +1,121 @@
+"""
+Memory and decode time of InternTable on a synthetic corpus of players
+
+Each player is a profile summary plus a stats summary covering 12 heroes,
+shaped like the payloads of the summary and stats/summary endpoints.
+
+    python benchmarks/intern_memory.py [players]
+
+The checkout the script lives in is imported, so it runs without
+installing the package.
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from overwatchpy.interning import InternTable  # noqa: E402
+
+HEROES = [
+    "ana", "ashe", "baptiste", "bastion", "brigitte", "cassidy", "dva",
+    "doomfist", "echo", "genji", "hanzo", "junker-queen", "junkrat", "kiriko",
+    "lifeweaver", "lucio", "mei", "mercy", "moira", "orisa", "pharah",
+    "ramattra", "reaper", "reinhardt", "roadhog", "sigma", "sojourn",
+    "soldier-76", "sombra", "symmetra", "torbjorn", "tracer", "widowmaker",
+    "winston", "wrecking-ball", "zarya", "zenyatta",
+]  # fmt: skip
+DIVISIONS = ["bronze", "silver", "gold", "platinum", "diamond", "master"]
+ICONS = "https://static.playoverwatch.com/img/pages/career/icons/"
+TOTALS = ["eliminations", "assists", "deaths", "damage", "healing"]
+
+
+def stats(rng: random.Random) -> dict:
+    return {
+        "games_played": rng.randint(0, 5000),
+        "games_won": rng.randint(0, 5000),
+        "games_lost": rng.randint(0, 5000),
+        "time_played": rng.randint(0, 500000),
+        "winrate": round(rng.random() * 100, 2),
+        "kda": round(rng.random() * 5, 2),
+        "total": {key: rng.randint(0, 99999) for key in TOTALS},
+        "average": {key: round(rng.random() * 20, 2) for key in TOTALS},
+    }
+
+
+def player(rng: random.Random, index: int) -> str:
+    division = rng.choice(DIVISIONS)
+    tier = rng.randint(1, 5)
+    summary = {
+        "username": "Player%d" % index,
+        "avatar": "https://d15f34w2p8l1cc.cloudfront.net/overwatch/%x.png"
+        % rng.getrandbits(64),
+        "namecard": None,
+        "title": "Bot",
+        "endorsement": {
+            "level": tier,
+            "frame": ICONS + "endorsement/%d-8b9f0faa25.svg" % tier,
+        },
+        "competitive": {
+            "pc": {
+                "season": 9,
+                "tank": {
+                    "division": division,
+                    "tier": tier,
+                    "role_icon": ICONS + "role/tank-f64702b684.svg",
+                    "rank_icon": ICONS + "rank/%sTier-3d7f4fd41a.png" % division,
+                    "tier_icon": ICONS + "rank/TierDivision-%d-b9e0e6b6e3.png" % tier,
+                },
+            }
+        },
+        "privacy": "public",
+    }
+    player_stats = {
+        "general": stats(rng),
+        "heroes": {hero: stats(rng) for hero in rng.sample(HEROES, 12)},
+        "roles": {role: stats(rng) for role in ("tank", "damage", "support")},
+    }
+    return json.dumps({"summary": summary, "stats": player_stats})
+
+
+def measure(documents, loads):
+    gc.collect()
+    tracemalloc.start()
+    kept = [loads(document) for document in documents]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    gc.collect()
+    started = time.perf_counter()
+    for document in documents:
+        loads(document)
+    return memory, time.perf_counter() - started
+
+
+def main() -> None:
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(1)
+    documents = [player(rng, index) for index in range(players)]
+
+    plain_memory, plain_time = measure(documents, json.loads)
+    table = InternTable()
+    interned_memory, interned_time = measure(documents, table.loads)
+
+    saved = plain_memory - interned_memory
+    print("players:  %d" % players)
+    print("plain:    %.1f MiB, %.2f s" % (plain_memory / 2**20, plain_time))
+    print("interned: %.1f MiB, %.2f s" % (interned_memory / 2**20, interned_time))
+    print(
+        "saved:    %.1f MiB (%.0f%%), %d strings in the table"
+        % (saved / 2**20, 100 * saved / plain_memory, len(table))
+    )
+    print("slowdown: %.2fx decode time" % (interned_time / plain_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
 from .core import Overwatch
+from .leaderboard import Leaderboard
+from .locales import LocalizedData
+from .search import PlayerSearchIndex
 
 __version__: str = "0.0.4"
@@ -1,15 +1,27 @@
 from __future__ import absolute_import
 
 import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
-from typing import Callable
+from typing import Callable, Deque, List, Optional
 
 import requests
-from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.request import ACCEPT_ENCODING
 from requests.packages.urllib3.util.retry import Retry
 
 from .const import locale
-from .errors import OverwatchAPIError
+from .errors import DeadlineExceeded, OverwatchAPIError
+from .interning import InternTable
+from .transport import (
+    DeadlineAdapter,
+    RecordingAdapter,
+    ReplayAdapter,
+    current_deadline,
+    read_before_deadline,
+    time_left,
+)
 
 __version__ = "0.0.4"
 
@@ -18,6 +30,52 @@ logger.addHandler(logging.NullHandler())
 logger.setLevel(logging.DEBUG)
 
 
+# Number of recent latencies kept to estimate the hedging delay
+HEDGE_WINDOW: int = 200
+# Don't hedge until this many latencies have been observed
+HEDGE_MIN_SAMPLES: int = 20
+
+
+def accepted_encodings() -> List[str]:
+    """
+    Returns the content codings the installed urllib3 can decode
+
+    urllib3 only lists br and zstd when it supports them and a usable
+    brotli or zstandard package is installed.
+
+    returns
+    -------
+    List[str]
+    """
+    return [encoding.strip() for encoding in ACCEPT_ENCODING.split(",")]
+
+
+class DeadlineRetry(Retry):
+    """
+    Retry that gives up once the deadline of the current request has passed
+
+    The deadline is shared with the adapters through a thread local set by
+    Client._send. Backoff and Retry-After sleeps are cut short to fit it.
+    """
+
+    def is_exhausted(self) -> bool:
+        if time_left() == 0:
+            return True
+        return super().is_exhausted()
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        remaining = time_left()
+        return backoff if remaining is None else min(backoff, remaining)
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        remaining = time_left()
+        if retry_after is None or remaining is None:
+            return retry_after
+        return min(retry_after, remaining)
+
+
 class EndPoint(Enum):
     domain: str = "overfast-api.tekrop.fr"
     scheme: str = "https"
@@ -30,6 +88,7 @@ class EndPoint(Enum):
     map_url: str = api_base + "maps"
     gamemodes_url: str = api_base + "gamemodes"
     heroes_url: str = api_base + "heroes"
+    hero_url: str = api_base + "heroes/{hero}"
 
 
 class Client:
@@ -41,6 +100,12 @@ class Client:
         self,
         use_retry: bool = True,
         timeout: int = 30,
+        hedge: bool = False,
+        record: Optional[str] = None,
+        replay: Optional[str] = None,
+        replay_speed: float = 1.0,
+        intern_strings: bool = False,
+        hedge_workers: int = 8,
     ) -> None:
         """
         Parameters
@@ -50,26 +115,177 @@ class Client:
           Whether to retry on HTTP status codes 500, 502, 503, 504
         timeout : int
           default: 30
-          The timeout for the requests
+          The end-to-end deadline for a request, covering connect, read
+          and all retries (each attempt, retries included, is given only the
+          time left when it starts)
+        hedge : bool
+          default: False
+          Whether to send a second identical GET when the first has not
+          answered within the observed p95 latency; the first response wins
+        record : str
+          default: None
+          Path of a log to record every request and response to
+        replay : str
+          default: None
+          Path of a recorded log to serve responses from instead of the API
+        replay_speed : float
+          default: 1.0
+          How much faster than recorded replayed responses are served
+          (0 serves them without delay)
+        intern_strings : bool
+          default: False
+          Whether decoded payloads share one copy of repeated keys and
+          enum-like values (hero keys, stat names, roles, asset URLs); saves
+          memory when many players are kept around, at the cost of slower
+          decoding (see benchmarks/intern_memory.py)
+        hedge_workers : int
+          default: 8
+          Threads available to hedged requests; each hedged GET uses up to
+          two. Requests that are not hedged run on the calling thread.
         """
         self.session: requests.session = requests.session()
         self.session.headers["User-Agent"] = "overwatchpy/%s" % __version__
         self.session.headers["Accept"] = "application/json"
+        self.session.headers["Accept-Encoding"] = ", ".join(accepted_encodings())
         self.timeout: int = timeout
+        retries: Retry = Retry(0, read=False)
         if use_retry:
             # Retry maximum 10 times, backoff on each retry
             # Sleeps 1s, 2s, 4s, 8s, etc to a maximum of 120s between retries
             # Retries on HTTP status codes 500, 502, 503, 504
-            retries: Retry = Retry(
+            retries = DeadlineRetry(
                 total=10, backoff_factor=1, status_forcelist=[500, 502, 503, 504]
             )
-            self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        if replay is not None and record is not None:
+            raise ValueError("record and replay can't be used together")
+        if replay is not None:
+            adapter = ReplayAdapter(replay, speed=replay_speed, max_retries=retries)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        elif record is not None:
+            adapter = RecordingAdapter(record, max_retries=retries)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        else:
+            adapter = DeadlineAdapter(max_retries=retries)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
 
         self.local: list = locale
+        self.hedge: bool = hedge
+        self.intern_table: Optional[InternTable] = (
+            InternTable() if intern_strings else None
+        )
+        # Latencies (seconds) of the most recent successful requests,
+        # used to pick the hedging delay
+        self._latencies: Deque[float] = deque(maxlen=HEDGE_WINDOW)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if hedge:
+            self._executor = ThreadPoolExecutor(
+                max_workers=hedge_workers, thread_name_prefix="overwatchpy"
+            )
 
     def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
         self.session.close()
 
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Returns the p95 of the recently observed latencies, or None if
+        not enough requests have been made yet to estimate it
+
+        returns
+        -------
+        Optional[float]
+        """
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        headers: dict,
+        allow_redirects: bool,
+        deadline: float,
+        decode_content: bool = True,
+    ) -> requests.Response:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(None, "Deadline exceeded before request was sent")
+        started = time.monotonic()
+        current_deadline.value = deadline
+        try:
+            # The body is streamed so that reading it is bound by the deadline
+            response = self.session.request(
+                method,
+                path,
+                params=params,
+                headers=headers,
+                allow_redirects=allow_redirects,
+                timeout=remaining,
+                stream=True,
+            )
+            if decode_content:
+                read_before_deadline(response, lambda: response.content)
+            else:
+                # Read the body as it came off the wire, still content-encoded
+                try:
+                    response.encoded_content = read_before_deadline(
+                        response, lambda: response.raw.read(decode_content=False)
+                    )
+                finally:
+                    response.close()
+        finally:
+            current_deadline.value = None
+        if response.status_code == 200:
+            self._latencies.append(time.monotonic() - started)
+        return response
+
+    def _hedged_send(
+        self,
+        args: tuple,
+        path: str,
+        timeout: float,
+        deadline: float,
+        hedge_delay: float,
+    ) -> requests.Response:
+        """
+        Sends a request on the executor and races a second identical one
+        against it once hedge_delay has passed without an answer
+        """
+        pending = {self._executor.submit(self._send, *args)}
+        hedged = False
+        response = None
+        error = None
+        while pending and response is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for future in pending:
+                    future.cancel()
+                raise DeadlineExceeded(
+                    None, "Request to %s did not finish within %ss" % (path, timeout)
+                )
+            wait_for = remaining if hedged else min(remaining, hedge_delay)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    response = future.result()
+                    break
+                error = future.exception()
+            if not done and not hedged:
+                logger.debug("Hedging request to %s after %.3fs", path, hedge_delay)
+                pending.add(self._executor.submit(self._send, *args))
+                hedged = True
+
+        if response is None:
+            raise error
+        return response
+
     def request(
         self,
         path,
@@ -79,6 +295,8 @@ class Client:
         raw: bool = False,
         allow_redirects: bool = True,
         timeout: int = None,
+        raw_bytes: bool = False,
+        decode_content: bool = True,
     ) -> Callable[[dict], OverwatchAPIError]:
         """
         Wrapper around requests.request()
@@ -104,7 +322,18 @@ class Client:
           Whether to allow redirects
         timeout : int
           default: None
-          The timeout for the request
+          The end-to-end deadline for the request in seconds, covering
+          connect, read and all retries (defaults to the client's timeout)
+        raw_bytes : bool
+          default: False
+          Whether to return the response body as a memoryview of bytes
+          instead of parsing it as JSON
+        decode_content : bool
+          default: True
+          Whether to undo the Content-Encoding (gzip, br, zstd) of the body;
+          when False the still-compressed body is returned as a memoryview
+          exactly as sent by the server (use raw=True to also get the
+          Content-Encoding header)
 
         returns
         -------
@@ -119,19 +348,50 @@ class Client:
         if not timeout:
             timeout: int = self.timeout
 
-        response = self.session.request(
+        deadline = time.monotonic() + timeout
+        hedge_delay = None
+        if self.hedge and method.upper() == "GET":
+            hedge_delay = self.hedge_delay()
+
+        args = (
             method,
             path,
-            params=params,
-            headers=headers,
-            allow_redirects=allow_redirects,
-            timeout=self.timeout,
+            params,
+            headers,
+            allow_redirects,
+            deadline,
+            decode_content,
         )
+        if hedge_delay is None:
+            try:
+                response = self._send(*args)
+            except requests.RequestException as error:
+                if time.monotonic() < deadline:
+                    raise
+                raise DeadlineExceeded(
+                    None, "Request to %s did not finish within %ss" % (path, timeout)
+                ) from error
+        else:
+            response = self._hedged_send(args, path, timeout, deadline, hedge_delay)
+
         logger.debug("Response: %s", response)
         if response.status_code != 200:
+            if not decode_content:
+                raise OverwatchAPIError(
+                    response.status_code, response.encoded_content
+                )
             raise OverwatchAPIError(response.status_code, response.text)
 
         if raw:
             return response
 
+        if not decode_content:
+            return memoryview(response.encoded_content)
+
+        if raw_bytes:
+            return memoryview(response.content)
+
+        if self.intern_table is not None:
+            return response.json(object_pairs_hook=self.intern_table.object_pairs_hook)
+
         return response.json()
@@ -2,7 +2,8 @@ from __future__ import absolute_import
 
 import logging
 import re
-from typing import Callable, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Literal, Optional
 
 try:
     from urllib import urlencode
@@ -13,6 +14,7 @@ from .api import Client, EndPoint
 from .errors import (
     InvalidBattletag,
     InvalidGamemode,
+    InvalidLocale,
     InvalidOrderBy,
     InvalidPrivacySettings,
     OverwatchAPIError,
@@ -30,30 +32,38 @@ from .objects import (
     OverwatchPlayerStats,
     AllPlayerStats,
 )
+from .leaderboard import Leaderboard
+from .locales import LocalizedData
+from .search import PlayerSearchIndex
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
 class Overwatch(Client):
-    client = Client()
-
     def __init__(
         self,
+        search_index: Optional[PlayerSearchIndex] = None,
+        leaderboard: Optional[Leaderboard] = None,
+        **kwargs,
     ) -> None:
         """
         Parameters
         ----------
-        battletag : str
-          The player's battletag
-        gamemode : str
-          The gamemode
-        platform : str
-          The platform
-        _data : dict
-          The data from the API
+        search_index : PlayerSearchIndex
+          default: None
+          A local index that answers repeated or narrowing player searches
+          without a network round trip
+        leaderboard : Leaderboard
+          default: None
+          Sorted hero/role indexes refreshed by every player_stats() call
+        **kwargs
+          Passed on to Client (timeout, hedge, record, replay, ...)
         """
-        super().__init__()
+        super().__init__(**kwargs)
+        self.client: Client = self
+        self.search_index: Optional[PlayerSearchIndex] = search_index
+        self.leaderboard: Optional[Leaderboard] = leaderboard
 
     def format_battletag(self, battletag: str) -> str:
         """
@@ -86,6 +96,23 @@ class Overwatch(Client):
         reg = r"^[a-zA-Z0-9]{3,12}#[0-9]{4,6}$"
         return bool(re.match(reg, battletag))
 
+    def name_check(self, name: str) -> bool:
+        """
+        Checks if a name is valid for a player search: a bare name, a name
+        prefix or a (partial) battletag
+
+        Parameters
+        ----------
+        name : str
+          The name or battletag
+
+        returns
+        -------
+        bool : bool
+        """
+        reg = r"^[a-zA-Z0-9]{1,12}(#[0-9]{0,6})?$"
+        return bool(re.match(reg, name))
+
     def player_search(
         self,
         battletag: str,
@@ -111,7 +138,7 @@ class Overwatch(Client):
         Parameters
         ----------
         battletag : str
-          The player's battletag
+          The player's name, a prefix of it or their battletag
         gamemode : str
           The gamemode
         platform : str
@@ -132,8 +159,8 @@ class Overwatch(Client):
         if battletag is None:
             raise InvalidBattletag("Battletag is required")
 
-        if not self.battle_tag_check(updated_battletag):
-            raise InvalidBattletag("Invalid battletag")
+        if not self.name_check(battletag):
+            raise InvalidBattletag("Invalid name")
 
         updated_battletag = self.format_battletag(battletag)
 
@@ -157,6 +184,21 @@ class Overwatch(Client):
             raise InvalidOrderBy(
                 "Order by must be either 'player_id:asc', 'player_id:desc', 'name:asc', 'name:desc', 'privacy:asc', 'privacy:desc'"
             )
+
+        if self.search_index is not None and self.search_index.covers(
+            updated_battletag, gamemode, platform, privacy
+        ):
+            logger.debug("Answering search for %s locally", updated_battletag)
+            return self.search_index.search(
+                updated_battletag,
+                gamemode=gamemode,
+                platform=platform,
+                privacy=privacy,
+                order_by=order_by,
+                offset=offset,
+                limit=limit,
+            )
+
         params = {
             "name": updated_battletag,
             "privacy": privacy,
@@ -170,7 +212,17 @@ class Overwatch(Client):
             path=EndPoint.player_url.value, params=urlencode(params)
         )
 
-        return [OverwatchPlayerSearch(response) for response in response]
+        search = OverwatchPlayerSearch(**response)
+        if self.search_index is not None:
+            self.search_index.add(
+                updated_battletag,
+                search,
+                gamemode,
+                platform,
+                privacy,
+                complete=offset == 0 and search.total <= len(search.results),
+            )
+        return search
 
     def ping(self) -> Callable[[dict], OverwatchAPIError]:
         """
@@ -200,7 +252,7 @@ class Overwatch(Client):
         if battletag is None:
             raise InvalidBattletag("Battletag is required")
 
-        if self.battle_tag_check(battletag):
+        if not self.battle_tag_check(battletag):
             raise InvalidBattletag("Invalid battletag")
 
         updated_battletag = self.format_battletag(battletag)
@@ -282,7 +334,12 @@ class Overwatch(Client):
             EndPoint.player_stats_summary_url.value.format(battletag=updated_battletag),
             params=urlencode(params),
         )
-        return OverwatchPlayerStats(**response)
+        stats = OverwatchPlayerStats(response)
+        if self.leaderboard is not None:
+            self.leaderboard.update(
+                updated_battletag.lower(), stats, gamemode=gamemode, platform=platform
+            )
+        return stats
 
     def player_career(
         self,
@@ -419,3 +476,100 @@ class Overwatch(Client):
             EndPoint.hero_url.value.format(hero=hero), params=urlencode(params)
         )
         return OverwatchHero(**response)
+
+    def _fetch_locales(
+        self, path: str, params: dict, locales: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Fetches the same path in several locales concurrently
+
+        Parameters
+        ----------
+        path : str
+          The path
+        params : dict
+          The query parameters, without the locale
+        locales : List[str]
+          The locales (None for every supported locale)
+
+        returns
+        -------
+        Dict[str, Any] : The decoded payload of each locale
+        """
+        if locales is None:
+            locales = self.local
+        unsupported = [locale for locale in locales if locale not in self.local]
+        if not locales or unsupported:
+            raise InvalidLocale(
+                "Locales must be among %s, got %s"
+                % (", ".join(self.local), ", ".join(unsupported) or "none")
+            )
+
+        # A pool of its own: request() already waits on the client's executor
+        with ThreadPoolExecutor(max_workers=len(locales)) as executor:
+            futures = {
+                locale: executor.submit(
+                    self.client.request,
+                    path,
+                    params=urlencode({**params, "locale": locale}),
+                )
+                for locale in locales
+            }
+            return {locale: future.result() for locale, future in futures.items()}
+
+    def heroes_all_locales(
+        self,
+        role: Literal["damage", "support", "tank"] = None,
+        locales: Optional[List[str]] = None,
+    ) -> Callable[[LocalizedData], OverwatchAPIError]:
+        """
+        Returns the heroes in several locales, fetched concurrently
+
+        Parameters
+        ----------
+        role : str
+          The role
+        locales : List[str]
+          The locales (default: every supported locale)
+
+        returns
+        -------
+        Callable[[LocalizedData], OverwatchAPIError] : Maps each locale to a
+        list of OverwatchHeros
+        """
+        params = {}
+        if role is not None:
+            params["role"] = role
+            if role not in ["damage", "support", "tank"]:
+                raise InvalidGamemode("Role must be either 'damage', 'support', 'tank'")
+        payloads = self._fetch_locales(EndPoint.heroes_url.value, params, locales)
+        return LocalizedData(
+            payloads, lambda response: [OverwatchHeros(**hero) for hero in response]
+        )
+
+    def hero_all_locales(
+        self,
+        hero: str,
+        locales: Optional[List[str]] = None,
+    ) -> Callable[[LocalizedData], OverwatchAPIError]:
+        """
+        Returns the hero in several locales, fetched concurrently
+
+        Parameters
+        ----------
+        hero : str
+          The hero
+        locales : List[str]
+          The locales (default: every supported locale)
+
+        returns
+        -------
+        Callable[[LocalizedData], OverwatchAPIError] : Maps each locale to an
+        OverwatchHero
+        """
+        if hero is None:
+            raise InvalidGamemode("Hero is required")
+        payloads = self._fetch_locales(
+            EndPoint.hero_url.value.format(hero=hero), {}, locales
+        )
+        return LocalizedData(payloads, lambda response: OverwatchHero(**response))
@@ -42,3 +42,19 @@ class InvalidOrderBy(Exception):
     """
 
     ...
+
+
+class InvalidLocale(Exception):
+    """
+    Raise when 'locale' or 'locales' key word argument is not recognized
+    """
+
+    ...
+
+
+class DeadlineExceeded(OverwatchAPIError):
+    """
+    Raise when a request (including all retries) does not finish before its deadline
+    """
+
+    ...
@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+
+import json
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+# Keys whose string values come from a small, shared set (hero keys, stat
+# names, roles, ranks and asset URLs) and are worth interning
+VALUE_KEYS: FrozenSet[str] = frozenset(
+    [
+        "key",
+        "label",
+        "category",
+        "role",
+        "division",
+        "privacy",
+        "platform",
+        "gamemode",
+        "portrait",
+        "icon",
+        "frame",
+        "role_icon",
+        "rank_icon",
+        "tier_icon",
+    ]
+)
+
+
+class InternTable:
+    """
+    A bounded table of strings shared across decoded payloads
+
+    Every player payload repeats the same keys and enum-like values; passing
+    the decoder through this table makes them all point to one copy. Once
+    the table is full new strings are returned as is, so memory stays
+    bounded however many distinct strings are seen.
+    """
+
+    def __init__(
+        self, maxsize: int = 65536, value_keys: FrozenSet[str] = VALUE_KEYS
+    ) -> None:
+        """
+        Parameters
+        ----------
+        maxsize : int
+          default: 65536
+          The maximum number of strings kept in the table
+        value_keys : FrozenSet[str]
+          default: VALUE_KEYS
+          The keys whose string values are interned (keys always are)
+        """
+        self.maxsize: int = maxsize
+        self.value_keys: FrozenSet[str] = value_keys
+        self._table: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._table
+
+    def clear(self) -> None:
+        self._table.clear()
+
+    def intern(self, value: str) -> str:
+        """
+        Returns the shared copy of a string, adding it if there is room
+
+        Parameters
+        ----------
+        value : str
+          The string
+
+        returns
+        -------
+        str : str
+        """
+        interned = self._table.get(value)
+        if interned is not None:
+            return interned
+        if len(self._table) < self.maxsize:
+            self._table[value] = value
+        return value
+
+    def object_pairs_hook(self, pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        """
+        json object_pairs_hook interning keys and enum-like values
+
+        Parameters
+        ----------
+        pairs : List[Tuple[str, Any]]
+          The decoded key/value pairs of a JSON object
+
+        returns
+        -------
+        Dict[str, Any]
+        """
+        obj: Dict[str, Any] = {}
+        for key, value in pairs:
+            key = self.intern(key)
+            if isinstance(value, str) and key in self.value_keys:
+                value = self.intern(value)
+            obj[key] = value
+        return obj
+
+    def loads(self, data: str) -> Any:
+        """
+        Decodes a JSON document through the table
+
+        Parameters
+        ----------
+        data : str
+          The JSON document
+
+        returns
+        -------
+        Any
+        """
+        return json.loads(data, object_pairs_hook=self.object_pairs_hook)
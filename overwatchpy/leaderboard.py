@@ -0,0 +1,397 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterator, List, Literal, Optional, Tuple
+
+from .objects import OverwatchPlayerStats
+from .search import normalize_name
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Stats that are indexed for every hero and role
+METRICS: Tuple[str, ...] = (
+    "winrate",
+    "kda",
+    "time_played",
+    "games_played",
+    "games_won",
+)
+
+# (kind, name, metric), e.g. ("hero", "ana", "winrate") or ("role", "tank", "kda")
+IndexKey = Tuple[str, str, str]
+# (gamemode, platform), e.g. ("competitive", "pc")
+Facet = Tuple[str, str]
+Entry = Tuple[float, str]
+
+
+class SortedList:
+    """
+    A sorted list split into buckets of at most 2 * LOAD entries
+
+    Adding or removing an entry is a binary search over the bucket maxima,
+    then one inside a bucket, plus an insert or delete that only shifts that
+    bucket. A plain sorted list would shift every entry after it. Positional
+    lookups walk the bucket sizes, which is n / LOAD steps.
+    """
+
+    LOAD: int = 512
+
+    def __init__(self) -> None:
+        self._buckets: List[List[Entry]] = []
+        self._maxes: List[Entry] = []
+        self._len: int = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Entry]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __reversed__(self) -> Iterator[Entry]:
+        for bucket in reversed(self._buckets):
+            yield from reversed(bucket)
+
+    def add(self, entry: Entry) -> None:
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+        position = bisect_left(self._maxes, entry)
+        if position == len(self._maxes):
+            position -= 1
+            self._buckets[position].append(entry)
+            self._maxes[position] = entry
+        else:
+            insort(self._buckets[position], entry)
+        bucket = self._buckets[position]
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[position : position + 1] = [
+                bucket[: self.LOAD],
+                bucket[self.LOAD :],
+            ]
+            self._maxes[position : position + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+
+    def remove(self, entry: Entry) -> None:
+        position = bisect_left(self._maxes, entry)
+        bucket = self._buckets[position]
+        del bucket[bisect_left(bucket, entry)]
+        self._len -= 1
+        if bucket:
+            self._maxes[position] = bucket[-1]
+        else:
+            del self._buckets[position]
+            del self._maxes[position]
+
+    def __getitem__(self, index: int) -> Entry:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        for bucket in self._buckets:
+            if index < len(bucket):
+                return bucket[index]
+            index -= len(bucket)
+
+    def count_at_or_below(self, value: float) -> int:
+        """
+        Returns the number of entries whose value is at most value
+        """
+        position = bisect_right(self._maxes, value, key=lambda entry: entry[0])
+        count = sum(len(bucket) for bucket in self._buckets[:position])
+        if position < len(self._buckets):
+            count += bisect_right(
+                self._buckets[position], value, key=lambda entry: entry[0]
+            )
+        return count
+
+
+class Leaderboard:
+    """
+    Sorted per-hero and per-role indexes over fetched player stats
+
+    Every (hero or role, metric) pair keeps its values in a SortedList, so
+    refreshing a player costs binary searches and a bucket-sized shift per
+    index, and top-N and percentile queries never rescan every player.
+    Stats of different gamemodes and platforms are not comparable, so each
+    (gamemode, platform) pair has indexes of its own and a player holds one
+    set of stats per pair. Players are keyed by their normalized battletag
+    (Foo#1234 -> foo-1234). The indexes are guarded by a lock, so stats may
+    be refreshed from several threads.
+    """
+
+    def __init__(
+        self,
+        gamemode: Optional[Literal["quickplay", "competitive"]] = None,
+        platform: Optional[Literal["pc", "console"]] = None,
+        metrics: Tuple[str, ...] = METRICS,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        gamemode : str
+          default: None
+          Only index stats for this gamemode, and query it by default
+        platform : str
+          default: None
+          Only index stats for this platform, and query it by default
+        metrics : Tuple[str, ...]
+          default: METRICS
+          The stats to index
+        """
+        self.gamemode: Optional[str] = gamemode
+        self.platform: Optional[str] = platform
+        self.metrics: Tuple[str, ...] = metrics
+        # Sorted (value, player) pairs per gamemode, platform and index
+        self._indexes: Dict[Facet, Dict[IndexKey, SortedList]] = {}
+        # player -> (gamemode, platform) -> the values they hold in each index
+        self._players: Dict[str, Dict[Facet, Dict[IndexKey, float]]] = {}
+        self._lock: threading.RLock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, player: str) -> bool:
+        return normalize_name(player) in self._players
+
+    def _facet(self, gamemode: Optional[str], platform: Optional[str]) -> Facet:
+        gamemode = gamemode or self.gamemode
+        platform = platform or self.platform
+        if gamemode is None or platform is None:
+            raise ValueError(
+                "gamemode and platform are required unless the leaderboard "
+                "is restricted to one"
+            )
+        return gamemode, platform
+
+    def update(
+        self,
+        player: str,
+        stats: OverwatchPlayerStats,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> None:
+        """
+        Adds or refreshes a player's stats for a gamemode and platform
+
+        Parameters
+        ----------
+        player : str
+          The player's battletag
+        stats : OverwatchPlayerStats
+          The player's stats
+        gamemode : str
+          default: None
+          The gamemode the stats are for (the leaderboard's if not given)
+        platform : str
+          default: None
+          The platform the stats are for (the leaderboard's if not given)
+        """
+        if self.gamemode is not None and gamemode not in (None, self.gamemode):
+            return
+        if self.platform is not None and platform not in (None, self.platform):
+            return
+        facet = self._facet(gamemode, platform)
+
+        values: Dict[IndexKey, float] = {}
+        for kind, entries in (("hero", stats.heroes), ("role", stats.roles)):
+            for name, entry in entries.items():
+                for metric in self.metrics:
+                    value = getattr(entry, metric, None)
+                    if value is not None:
+                        values[(kind, name, metric)] = value
+
+        player = normalize_name(player)
+        with self._lock:
+            self.remove(player, *facet)
+            indexes = self._indexes.setdefault(facet, {})
+            for key, value in values.items():
+                indexes.setdefault(key, SortedList()).add((value, player))
+            self._players.setdefault(player, {})[facet] = values
+
+    def remove(
+        self,
+        player: str,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> None:
+        """
+        Removes a player's stats from the indexes
+
+        Parameters
+        ----------
+        player : str
+          The player's battletag
+        gamemode : str
+          default: None
+          Only remove the stats of this gamemode
+        platform : str
+          default: None
+          Only remove the stats of this platform
+        """
+        player = normalize_name(player)
+        with self._lock:
+            facets = self._players.get(player, {})
+            for facet in list(facets):
+                if gamemode not in (None, facet[0]):
+                    continue
+                if platform not in (None, facet[1]):
+                    continue
+                for key, value in facets.pop(facet).items():
+                    self._indexes[facet][key].remove((value, player))
+            if not facets:
+                self._players.pop(player, None)
+
+    def _index(
+        self,
+        metric: str,
+        hero: Optional[str],
+        role: Optional[str],
+        facet: Facet,
+    ) -> SortedList:
+        if (hero is None) == (role is None):
+            raise ValueError("Exactly one of hero or role is required")
+        if metric not in self.metrics:
+            raise ValueError("Metric must be one of %s" % ", ".join(self.metrics))
+        indexes = self._indexes.get(facet, {})
+        if hero is not None:
+            return indexes.get(("hero", hero, metric), SortedList())
+        return indexes.get(("role", role, metric), SortedList())
+
+    def top(
+        self,
+        metric: str,
+        hero: Optional[str] = None,
+        role: Optional[str] = None,
+        limit: int = 100,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Returns the players with the highest value of a stat
+
+        Parameters
+        ----------
+        metric : str
+          The stat, e.g. "winrate"
+        hero : str
+          default: None
+          The hero key (one of hero or role is required)
+        role : str
+          default: None
+          The role
+        limit : int
+          default: 100
+          How many players to return
+        gamemode : str
+          default: None
+          The gamemode (the leaderboard's if not given)
+        platform : str
+          default: None
+          The platform (the leaderboard's if not given)
+
+        returns
+        -------
+        List[Tuple[str, float]] : (player, value) pairs, best first
+        """
+        facet = self._facet(gamemode, platform)
+        with self._lock:
+            index = self._index(metric, hero, role, facet)
+            result = []
+            for value, player in reversed(index):
+                if len(result) >= limit:
+                    break
+                result.append((player, value))
+            return result
+
+    def percentile(
+        self,
+        player: str,
+        metric: str,
+        hero: Optional[str] = None,
+        role: Optional[str] = None,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> Optional[float]:
+        """
+        Returns the share of indexed players (0-100) at or below a player
+
+        Parameters
+        ----------
+        player : str
+          The player's battletag
+        metric : str
+          The stat, e.g. "winrate"
+        hero : str
+          default: None
+          The hero key (one of hero or role is required)
+        role : str
+          default: None
+          The role
+        gamemode : str
+          default: None
+          The gamemode (the leaderboard's if not given)
+        platform : str
+          default: None
+          The platform (the leaderboard's if not given)
+
+        returns
+        -------
+        Optional[float] : None if the player has no value for the stat
+        """
+        facet = self._facet(gamemode, platform)
+        key = ("hero", hero, metric) if hero is not None else ("role", role, metric)
+        with self._lock:
+            index = self._index(metric, hero, role, facet)
+            facets = self._players.get(normalize_name(player), {})
+            value = facets.get(facet, {}).get(key)
+            if value is None:
+                return None
+            return 100.0 * index.count_at_or_below(value) / len(index)
+
+    def value_at(
+        self,
+        percentile: float,
+        metric: str,
+        hero: Optional[str] = None,
+        role: Optional[str] = None,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> Optional[float]:
+        """
+        Returns the value of a stat at a percentile (0-100)
+
+        Parameters
+        ----------
+        percentile : float
+          The percentile
+        metric : str
+          The stat, e.g. "winrate"
+        hero : str
+          default: None
+          The hero key (one of hero or role is required)
+        role : str
+          default: None
+          The role
+        gamemode : str
+          default: None
+          The gamemode (the leaderboard's if not given)
+        platform : str
+          default: None
+          The platform (the leaderboard's if not given)
+
+        returns
+        -------
+        Optional[float] : None if no player has a value for the stat
+        """
+        facet = self._facet(gamemode, platform)
+        with self._lock:
+            index = self._index(metric, hero, role, facet)
+            if not index:
+                return None
+            position = min(len(index) - 1, int(len(index) * percentile / 100.0))
+            return index[position][0]
@@ -0,0 +1,138 @@
+from __future__ import absolute_import
+
+from typing import Any, Callable, Dict, Iterator, List
+
+
+class Translated:
+    """
+    Placeholder for a value that differs between locales
+    """
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int) -> None:
+        self.index: int = index
+
+    def __repr__(self) -> str:
+        return f"Translated({self.index})"
+
+
+def split_locales(values: List[Any], texts: List[List[Any]]) -> Any:
+    """
+    Splits the same payload in several locales into shared and translated parts
+
+    Values equal in every locale are kept once in the returned structure;
+    the others are replaced by a Translated placeholder whose index points
+    into the per-locale lists of texts.
+
+    Parameters
+    ----------
+    values : List[Any]
+      The payload in each locale
+    texts : List[List[Any]]
+      The translated values of each locale, appended to
+
+    returns
+    -------
+    Any : The shared structure
+    """
+    first = values[0]
+    if all(value == first for value in values[1:]):
+        return first
+
+    if all(isinstance(value, dict) for value in values) and all(
+        value.keys() == first.keys() for value in values[1:]
+    ):
+        return {
+            key: split_locales([value[key] for value in values], texts)
+            for key in first
+        }
+
+    if all(isinstance(value, list) for value in values) and all(
+        len(value) == len(first) for value in values[1:]
+    ):
+        return [
+            split_locales([value[index] for value in values], texts)
+            for index in range(len(first))
+        ]
+
+    placeholder = Translated(len(texts[0]))
+    for locale_texts, value in zip(texts, values):
+        locale_texts.append(value)
+    return placeholder
+
+
+def merge_locale(shared: Any, texts: List[Any]) -> Any:
+    """
+    Rebuilds the payload of one locale from the shared structure
+
+    Parameters
+    ----------
+    shared : Any
+      The shared structure returned by split_locales
+    texts : List[Any]
+      The translated values of the locale
+
+    returns
+    -------
+    Any
+    """
+    if isinstance(shared, Translated):
+        return texts[shared.index]
+    if isinstance(shared, dict):
+        return {key: merge_locale(value, texts) for key, value in shared.items()}
+    if isinstance(shared, list):
+        return [merge_locale(value, texts) for value in shared]
+    return shared
+
+
+class LocalizedData:
+    """
+    The same API payload in several locales
+
+    Locale-invariant data (portraits, hitpoints, roles, ability icons, ...)
+    is stored once and only the translated text is kept per locale.
+    """
+
+    def __init__(
+        self, payloads: Dict[str, Any], factory: Callable[[Any], Any]
+    ) -> None:
+        """
+        Parameters
+        ----------
+        payloads : Dict[str, Any]
+          The decoded payload of each locale
+        factory : Callable[[Any], Any]
+          Builds the returned object from a locale's payload
+        """
+        self.factory: Callable[[Any], Any] = factory
+        texts: List[List[Any]] = [[] for _ in payloads]
+        self.shared: Any = split_locales(list(payloads.values()), texts)
+        self.translations: Dict[str, List[Any]] = dict(zip(payloads, texts))
+
+    def __len__(self) -> int:
+        return len(self.translations)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.translations)
+
+    def __contains__(self, locale: str) -> bool:
+        return locale in self.translations
+
+    def __getitem__(self, locale: str) -> Any:
+        return self.get(locale)
+
+    def get(self, locale: str) -> Any:
+        """
+        Returns the object for a locale
+
+        Parameters
+        ----------
+        locale : str
+          The locale
+
+        returns
+        -------
+        Any
+        """
+        return self.factory(merge_locale(self.shared, self.translations[locale]))
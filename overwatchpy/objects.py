@@ -156,12 +156,14 @@ class PlayerProfileSummary(BaseClass):
 class OverwatchPlayerStats(BaseClass):
     def __init__(self, data: Dict[str, Any]) -> None:
         super().__init__()
-        self.general = self.GeneralStats(data["general"])
+        self.general = self.OverwatchGeneralStats(data["general"])
         self.heroes = {
-            hero: self.HeroStats(stats) for hero, stats in data["heroes"].items()
+            hero: self.OverwatchHeroStats(stats)
+            for hero, stats in data["heroes"].items()
         }
         self.roles = {
-            role: self.RoleStats(stats) for role, stats in data["roles"].items()
+            role: self.OverwatchRoleStats(stats)
+            for role, stats in data["roles"].items()
         }
 
     class OverwatchGeneralStats:
@@ -0,0 +1,254 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from .objects import OverwatchPlayerSearch
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a name or battletag for prefix matching
+
+    Parameters
+    ----------
+    name : str
+      The name or battletag
+
+    returns
+    -------
+    str : str
+    """
+    return str(name).replace("#", "-").lower()
+
+
+class PlayerSearchIndex:
+    """
+    A local index over player search results
+
+    Names are kept in a sorted array so that prefix lookups are a binary
+    search followed by a short scan. A query is answered locally when a
+    fresh, complete search for one of its prefixes (with the same facets)
+    has already been made; otherwise it falls through to the API. Players
+    only match the gamemodes they were seen in within the TTL, and are
+    dropped once every sighting has gone stale. The index is guarded by a
+    lock, so it may be shared by several threads.
+    """
+
+    def __init__(self, ttl: int = 300) -> None:
+        """
+        Parameters
+        ----------
+        ttl : int
+          default: 300
+          How many seconds a search result stays fresh
+        """
+        self.ttl: int = ttl
+        # Sorted (normalized name, player_id, platform) keys
+        self._keys: List[Tuple[str, str, str]] = []
+        # (player_id, platform) -> player result
+        self._players: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # (player_id, platform) -> gamemode -> time the player was last seen
+        self._seen: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # (normalized prefix, gamemode, platform, privacy) -> time of the search
+        self._searches: Dict[Tuple[str, str, str, str], float] = {}
+        self._pruned: float = time.monotonic()
+        self._lock: threading.RLock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._players.clear()
+            self._seen.clear()
+            self._searches.clear()
+
+    def _remove_key(self, name_key: str, player_id: str, platform: str) -> None:
+        position = bisect_left(self._keys, (name_key, player_id, platform))
+        if position < len(self._keys) and self._keys[position] == (
+            name_key,
+            player_id,
+            platform,
+        ):
+            del self._keys[position]
+
+    def prune(self) -> None:
+        """
+        Drops searches and players that have not been seen within the TTL
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._pruned = now
+            for key, searched_at in list(self._searches.items()):
+                if now - searched_at >= self.ttl:
+                    del self._searches[key]
+            for key, seen in list(self._seen.items()):
+                for gamemode, seen_at in list(seen.items()):
+                    if now - seen_at >= self.ttl:
+                        del seen[gamemode]
+                if not seen:
+                    del self._seen[key]
+                    player = self._players.pop(key)
+                    self._remove_key(normalize_name(player["name"]), *key)
+
+    def add(
+        self,
+        name: str,
+        search: OverwatchPlayerSearch,
+        gamemode: str,
+        platform: str,
+        privacy: str,
+        complete: bool = True,
+    ) -> None:
+        """
+        Adds the results of a search to the index
+
+        Parameters
+        ----------
+        name : str
+          The name that was searched for
+        search : OverwatchPlayerSearch
+          The search results
+        gamemode : str
+          The gamemode
+        platform : str
+          The platform
+        privacy : str
+          The privacy settings
+        complete : bool
+          default: True
+          Whether the results hold every match for the name; only complete
+          searches can answer narrower queries locally
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._pruned >= self.ttl:
+                self.prune()
+
+            for result in search.results:
+                player = dict(result)
+                player.setdefault("platform", platform)
+                player.setdefault("privacy", privacy)
+                key = (player["player_id"], platform)
+                name_key = normalize_name(player["name"])
+                previous = self._players.get(key)
+                if previous is None:
+                    insort(self._keys, (name_key, *key))
+                elif normalize_name(previous["name"]) != name_key:
+                    # The player was renamed, move them to their new name
+                    self._remove_key(normalize_name(previous["name"]), *key)
+                    insort(self._keys, (name_key, *key))
+                self._players[key] = player
+                self._seen.setdefault(key, {})[gamemode] = now
+
+            if complete:
+                key = (normalize_name(name), gamemode, platform, privacy)
+                self._searches[key] = now
+
+    def covers(self, name: str, gamemode: str, platform: str, privacy: str) -> bool:
+        """
+        Checks if a fresh, complete search for a prefix of the name exists
+
+        Parameters
+        ----------
+        name : str
+          The name to search for
+        gamemode : str
+          The gamemode
+        platform : str
+          The platform
+        privacy : str
+          The privacy settings
+
+        returns
+        -------
+        bool : bool
+        """
+        name = normalize_name(name)
+        with self._lock:
+            now = time.monotonic()
+            for length in range(len(name), -1, -1):
+                key = (name[:length], gamemode, platform, privacy)
+                searched_at = self._searches.get(key)
+                if searched_at is not None and now - searched_at < self.ttl:
+                    return True
+            return False
+
+    def search(
+        self,
+        name: str,
+        gamemode: Optional[str] = None,
+        platform: Optional[str] = None,
+        privacy: Optional[str] = None,
+        order_by: str = "name:asc",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> OverwatchPlayerSearch:
+        """
+        Searches the index for players whose name starts with the given name
+
+        Parameters
+        ----------
+        name : str
+          The name prefix
+        gamemode : str
+          default: None
+          Only return players seen in this gamemode within the TTL
+        platform : str
+          default: None
+          Only return players on this platform
+        privacy : str
+          default: None
+          Only return players with these privacy settings
+        order_by : str
+          default: "name:asc"
+          The order by
+        offset : int
+          default: 0
+          The offset
+        limit : int
+          default: 20
+          The limit
+
+        returns
+        -------
+        OverwatchPlayerSearch
+        """
+        prefix = normalize_name(name)
+        with self._lock:
+            now = time.monotonic()
+            matches: List[Dict[str, str]] = []
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys):
+                key_name, player_id, player_platform = self._keys[position]
+                if not key_name.startswith(prefix):
+                    break
+                position += 1
+                key = (player_id, player_platform)
+                player = self._players[key]
+                if gamemode is not None:
+                    seen_at = self._seen[key].get(gamemode)
+                    if seen_at is None or now - seen_at >= self.ttl:
+                        continue
+                if platform is not None and player["platform"] != platform:
+                    continue
+                if privacy is not None and player["privacy"] != privacy:
+                    continue
+                matches.append(player)
+
+        field, direction = order_by.split(":")
+        if field != "name" or direction != "asc":
+            matches.sort(
+                key=lambda player: player[field], reverse=direction == "desc"
+            )
+        return OverwatchPlayerSearch(
+            total=len(matches), results=matches[offset : offset + limit]
+        )
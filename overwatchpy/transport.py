@@ -0,0 +1,473 @@
+from __future__ import absolute_import
+
+import abc
+import base64
+import gzip
+import io
+import json
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ReadTimeout, RequestException
+from requests.packages.urllib3.exceptions import HTTPError, MaxRetryError
+from requests.packages.urllib3.response import HTTPResponse
+from requests.packages.urllib3.util.retry import Retry
+
+from .errors import OverwatchAPIError
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+# Deadline (time.monotonic()) of the request being sent on this thread, set
+# by Client._send so that the adapters can fit every attempt into it
+current_deadline = threading.local()
+
+
+def time_left() -> Optional[float]:
+    """
+    Returns the seconds left before the current request's deadline
+
+    returns
+    -------
+    Optional[float] : None if no deadline is set on this thread
+    """
+    deadline = getattr(current_deadline, "value", None)
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def cap_timeout(timeout: Any, left: float) -> Any:
+    """
+    Caps a requests timeout (a number, a (connect, read) tuple or None)
+
+    Parameters
+    ----------
+    timeout : Any
+      The timeout
+    left : float
+      The most any part of it may be
+
+    returns
+    -------
+    Any : A timeout of the same shape
+    """
+    if isinstance(timeout, tuple):
+        return tuple(left if part is None else min(part, left) for part in timeout)
+    return left if timeout is None else min(timeout, left)
+
+
+def _socket_of(response: Response) -> Optional[socket.socket]:
+    # The connection lets go of its socket once the server says it will
+    # close it, the body's file object still holds on to it then
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is None:
+        fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    return sock
+
+
+def read_before_deadline(response: Response, read: Callable[[], T]) -> T:
+    """
+    Reads a streamed response body, giving up once the deadline passes
+
+    Socket timeouts only bound each read, so a body trickled in just fast
+    enough would outlive any deadline. Instead the socket is shut down when
+    the deadline passes, which fails whatever read is blocked on it.
+
+    Parameters
+    ----------
+    response : Response
+      The response, sent with stream=True
+    read : Callable[[], T]
+      Reads the body
+
+    returns
+    -------
+    T : What read returned
+    """
+    left = time_left()
+    sock = _socket_of(response)
+    if left is None or sock is None:
+        return read()
+
+    expired = threading.Event()
+
+    def expire() -> None:
+        expired.set()
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    timer = threading.Timer(left, expire)
+    timer.daemon = True
+    timer.start()
+    try:
+        result = read()
+    except (RequestException, HTTPError) as error:
+        if expired.is_set():
+            raise ReadTimeout(
+                "Body not read before the deadline", request=response.request
+            ) from error
+        raise
+    finally:
+        timer.cancel()
+    if expired.is_set():
+        # A body without a length just looks like it ended early
+        raise ReadTimeout(
+            "Body not read before the deadline", request=response.request
+        )
+    return result
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the entries of a recording made by RecordingAdapter
+
+    Each run appended to the recording starts with a marker and measures
+    its offsets from its own start, so the offsets of a run are shifted to
+    start where the requests of the runs before it ended, which plays the
+    runs back to back.
+
+    Parameters
+    ----------
+    path : str
+      The path of the recording
+
+    returns
+    -------
+    Iterator[Dict[str, Any]]
+    """
+    # Offset at which the current run starts, and the latest end so far
+    start = end = 0.0
+    with gzip.open(path, "rt", encoding="utf-8") as log:
+        for line in log:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "run" in entry:
+                start = end
+                continue
+            entry["offset"] = round(start + entry["offset"], 6)
+            end = max(end, entry["offset"] + entry["elapsed"])
+            yield entry
+
+
+def build_response(
+    adapter: HTTPAdapter, request: PreparedRequest, entry: Dict[str, Any]
+) -> Response:
+    """
+    Builds a response from a recorded entry
+
+    The body is stored as it came off the wire, so Content-Encoding is
+    honoured exactly as it would be for a live response.
+
+    Parameters
+    ----------
+    adapter : HTTPAdapter
+      The adapter building the response
+    request : PreparedRequest
+      The request being answered
+    entry : Dict[str, Any]
+      The recorded entry
+
+    returns
+    -------
+    Response
+    """
+    raw = HTTPResponse(
+        body=io.BytesIO(base64.b64decode(entry["body"])),
+        headers=entry["headers"],
+        status=entry["status"],
+        preload_content=False,
+        decode_content=False,
+    )
+    response = adapter.build_response(request, raw)
+    response.elapsed = timedelta(seconds=entry["elapsed"])
+    return response
+
+
+class RetryingAdapter(HTTPAdapter, abc.ABC):
+    """
+    A transport adapter that retries above the wire instead of inside urllib3
+
+    Every attempt goes through _attempt(), so each one of them can be
+    recorded or replayed, and each is given a timeout capped at the time
+    left before the current request's deadline when it starts. A response
+    whose status is still retryable once the retries are exhausted is
+    returned as is.
+    """
+
+    def __init__(self, max_retries=None, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        max_retries : Union[Retry, int, None]
+          default: None
+          The retries applied to every request (none by default)
+        """
+        super().__init__(**kwargs)
+        self.retries: Retry = Retry.from_int(
+            max_retries if max_retries is not None else Retry(0, read=False)
+        )
+
+    @abc.abstractmethod
+    def _attempt(self, request: PreparedRequest, **kwargs) -> Response:
+        """
+        Makes one attempt at sending a request, raising RequestException if
+        it fails without a response
+        """
+
+    def _sleep(self, retries: Retry, response: Optional[HTTPResponse]) -> None:
+        retries.sleep(response)
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        retries = self.retries
+        while True:
+            left = time_left()
+            if left is not None:
+                if left <= 0:
+                    raise ReadTimeout(
+                        "Deadline passed before the request was sent",
+                        request=request,
+                    )
+                kwargs["timeout"] = cap_timeout(kwargs.get("timeout"), left)
+            try:
+                response = self._attempt(request, **kwargs)
+            except RequestException as error:
+                try:
+                    retries = retries.increment(
+                        request.method, request.url, error=error
+                    )
+                except MaxRetryError:
+                    raise error
+                self._sleep(retries, None)
+                continue
+
+            has_retry_after = "Retry-After" in response.headers
+            if not retries.is_retry(
+                request.method, response.status_code, has_retry_after
+            ):
+                return response
+            try:
+                retries = retries.increment(
+                    request.method, request.url, response=response.raw
+                )
+            except MaxRetryError:
+                return response
+            response.close()
+            self._sleep(retries, response.raw)
+
+
+class DeadlineAdapter(RetryingAdapter):
+    """
+    A transport adapter sending requests over the network
+
+    Unlike urllib3's own retries, which reuse one timeout for every attempt,
+    a retry is only given the time left before the deadline.
+    """
+
+    def _attempt(self, request: PreparedRequest, **kwargs) -> Response:
+        return HTTPAdapter.send(self, request, **kwargs)
+
+
+class RecordingAdapter(RetryingAdapter):
+    """
+    A transport adapter that records every request and response
+
+    Each attempt, including retried ones and those that failed without a
+    response, is appended to a gzipped JSON lines log holding the method,
+    URL (including the query parameters), status, headers, the undecoded
+    body and its timing. Every adapter starts a new run in the log, marked
+    with the time it started, and offsets are measured from that.
+    """
+
+    def __init__(self, path: str, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+          The path of the recording, appended to if it exists
+        """
+        super().__init__(**kwargs)
+        self.path: str = path
+        self._log = gzip.open(path, "at", encoding="utf-8")
+        self._lock: threading.Lock = threading.Lock()
+        self._started: float = time.monotonic()
+        self._write({"run": time.time()})
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _attempt(self, request: PreparedRequest, **kwargs) -> Response:
+        started = time.monotonic()
+        entry: Dict[str, Any] = {
+            "offset": round(started - self._started, 6),
+            "method": request.method,
+            "url": request.url,
+        }
+        try:
+            response = HTTPAdapter.send(self, request, **dict(kwargs, stream=True))
+            try:
+                body = read_before_deadline(
+                    response, lambda: response.raw.read(decode_content=False)
+                )
+            finally:
+                response.close()
+        except (RequestException, HTTPError) as error:
+            entry["elapsed"] = round(time.monotonic() - started, 6)
+            entry["error"] = "%s: %s" % (type(error).__name__, error)
+            self._write(entry)
+            raise
+        entry["elapsed"] = round(time.monotonic() - started, 6)
+        entry["status"] = response.status_code
+        entry["headers"] = dict(response.headers)
+        entry["body"] = base64.b64encode(body).decode("ascii")
+        self._write(entry)
+        return build_response(self, request, entry)
+
+    def close(self) -> None:
+        with self._lock:
+            self._log.close()
+        super().close()
+
+
+class ReplayAdapter(RetryingAdapter):
+    """
+    A transport adapter that serves responses from a recording
+
+    Responses to the same method and URL are served in the order they were
+    recorded, wrapping around once exhausted; recorded failures are raised
+    again as ConnectionError. Each response, and each retry backoff, is
+    delayed by its recorded duration divided by speed; a speed of 0 serves
+    immediately. A response delayed past the request's read timeout raises
+    ReadTimeout once the timeout has passed, as the live one would have.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+          The path of the recording
+        speed : float
+          default: 1.0
+          How much faster than recorded to serve responses
+        """
+        super().__init__(**kwargs)
+        self.path: str = path
+        self.speed: float = speed
+        self.entries: List[Dict[str, Any]] = list(read_recording(path))
+        self._responses: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        for entry in self.entries:
+            key = (entry["method"], entry["url"])
+            self._responses.setdefault(key, deque()).append(entry)
+        self._lock: threading.Lock = threading.Lock()
+
+    def _sleep(self, retries: Retry, response: Optional[HTTPResponse]) -> None:
+        if not self.speed:
+            return
+        backoff = None
+        if response is not None:
+            backoff = retries.get_retry_after(response)
+        if backoff is None:
+            backoff = retries.get_backoff_time()
+        time.sleep(backoff / self.speed)
+
+    def _attempt(self, request: PreparedRequest, **kwargs) -> Response:
+        with self._lock:
+            responses = self._responses.get((request.method, request.url))
+            if not responses:
+                raise OverwatchAPIError(
+                    None,
+                    "No recorded response for %s %s" % (request.method, request.url),
+                )
+            entry = responses[0]
+            responses.rotate(-1)
+        if self.speed:
+            delay = entry["elapsed"] / self.speed
+            timeout = kwargs.get("timeout")
+            if isinstance(timeout, tuple):
+                timeout = timeout[1]
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                raise ReadTimeout(
+                    "Recorded response took %.3fs, longer than the %.3fs timeout"
+                    % (delay, timeout),
+                    request=request,
+                )
+            time.sleep(delay)
+        if "error" in entry:
+            raise ConnectionError(entry["error"], request=request)
+        return build_response(self, request, entry)
+
+
+def replay_traffic(
+    client, path: str, speed: float = 1.0, concurrency: int = 8
+) -> List[float]:
+    """
+    Replays the requests of a recording through a client
+
+    Requests are issued at their recorded offsets divided by speed (0 issues
+    them as fast as the workers allow), which reproduces the recorded traffic
+    pattern against whatever transport, caching or concurrency settings the
+    client uses.
+
+    Parameters
+    ----------
+    client : Client
+      The client to send the requests with
+    path : str
+      The path of the recording
+    speed : float
+      default: 1.0
+      How much faster than recorded to issue requests
+    concurrency : int
+      default: 8
+      How many requests may be in flight at once
+
+    returns
+    -------
+    List[float] : The latency of each request in seconds, in recorded order
+    """
+
+    def send(entry: Dict[str, Any]) -> float:
+        sent = time.monotonic()
+        try:
+            client.request(entry["url"], method=entry["method"], raw=True)
+        except (OverwatchAPIError, RequestException) as error:
+            logger.debug("Replayed request failed: %s", error)
+        return time.monotonic() - sent
+
+    futures = []
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for entry in read_recording(path):
+            if speed:
+                delay = started + entry["offset"] / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(executor.submit(send, entry))
+    return [future.result() for future in futures]
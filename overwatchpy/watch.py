@@ -0,0 +1,437 @@
+from __future__ import absolute_import
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+import requests
+
+from .api import __version__
+from .core import Overwatch
+from .errors import InvalidBattletag
+from .objects import PlayerProfileSummary
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Subscribing to this battletag receives the events of every watched player
+ALL_PLAYERS: str = "*"
+
+
+class RankChange:
+    """
+    A change of a player's competitive rank or endorsement level
+    """
+
+    def __init__(
+        self,
+        battletag: str,
+        kind: str,
+        old: Any,
+        new: Any,
+        platform: Optional[str] = None,
+        role: Optional[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        battletag : str
+          The player's battletag
+        kind : str
+          "competitive" or "endorsement"
+        old : Any
+          The previous rank or endorsement level
+        new : Any
+          The new rank or endorsement level
+        platform : str
+          default: None
+          The platform of a competitive rank
+        role : str
+          default: None
+          The role of a competitive rank
+        """
+        self.battletag: str = battletag
+        self.kind: str = kind
+        self.old: Any = old
+        self.new: Any = new
+        self.platform: Optional[str] = platform
+        self.role: Optional[str] = role
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "battletag": self.battletag,
+            "kind": self.kind,
+            "platform": self.platform,
+            "role": self.role,
+            "old": self.old,
+            "new": self.new,
+        }
+
+    def __str__(self) -> str:
+        if self.kind == "endorsement":
+            return f"{self.battletag}: endorsement {self.old} -> {self.new}"
+        return f"{self.battletag}: {self.platform} {self.role} {self.old} -> {self.new}"
+
+
+def ranks(summary: PlayerProfileSummary) -> Dict[Tuple[str, str], Any]:
+    """
+    Returns the competitive rank of each platform and role
+
+    Parameters
+    ----------
+    summary : PlayerProfileSummary
+      The player's summary
+
+    returns
+    -------
+    Dict[Tuple[str, str], Any] : (platform, role) -> {"division", "tier"}
+    """
+    result: Dict[Tuple[str, str], Any] = {}
+    for platform, roles in (summary.competitive or {}).items():
+        for role, rank in (roles or {}).items():
+            if isinstance(rank, dict):
+                result[(platform, role)] = {
+                    "division": rank.get("division"),
+                    "tier": rank.get("tier"),
+                }
+    return result
+
+
+def changes(
+    battletag: str, old: PlayerProfileSummary, new: PlayerProfileSummary
+) -> List[RankChange]:
+    """
+    Returns the rank and endorsement changes between two summaries
+
+    Parameters
+    ----------
+    battletag : str
+      The player's battletag
+    old : PlayerProfileSummary
+      The previous summary
+    new : PlayerProfileSummary
+      The current summary
+
+    returns
+    -------
+    List[RankChange]
+    """
+    events: List[RankChange] = []
+    old_ranks, new_ranks = ranks(old), ranks(new)
+    for platform, role in sorted(set(old_ranks) | set(new_ranks)):
+        before = old_ranks.get((platform, role))
+        after = new_ranks.get((platform, role))
+        if before != after:
+            events.append(
+                RankChange(battletag, "competitive", before, after, platform, role)
+            )
+
+    old_level = (old.endorsement or {}).get("level")
+    new_level = (new.endorsement or {}).get("level")
+    if old_level != new_level:
+        events.append(RankChange(battletag, "endorsement", old_level, new_level))
+    return events
+
+
+Subscriber = Union[str, asyncio.Queue]
+
+
+class Watcher:
+    """
+    A shared refresh loop pushing rank and endorsement changes to subscribers
+
+    Subscriptions to the same battletag (compared case-insensitively) share
+    one fetch per interval, however many webhooks or async iterators are
+    listening to it.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Overwatch] = None,
+        interval: float = 300,
+        concurrency: int = 16,
+        queue_size: int = 1000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        client : Overwatch
+          default: None
+          The client used to fetch summaries (a new one if not given)
+        interval : float
+          default: 300
+          Seconds between refreshes of a player
+        concurrency : int
+          default: 16
+          How many summaries may be fetched at once
+        queue_size : int
+          default: 1000
+          How many events the queue of an async iterator holds; events for
+          a full queue are dropped
+        """
+        self.client: Overwatch = client or Overwatch()
+        self.interval: float = interval
+        self.concurrency: int = concurrency
+        self.queue_size: int = queue_size
+        # Webhooks get a session of their own, away from the API's transport
+        self.webhooks: requests.Session = requests.Session()
+        self.webhooks.headers["User-Agent"] = "overwatchpy/%s" % __version__
+        # normalized battletag -> webhook URLs and queues listening to it
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        # normalized battletag -> battletag as first subscribed, used to fetch
+        self._battletags: Dict[str, str] = {}
+        # normalized battletag -> last fetched summary
+        self._summaries: Dict[str, PlayerProfileSummary] = {}
+
+    def __len__(self) -> int:
+        return len(self._battletags)
+
+    @property
+    def battletags(self) -> List[str]:
+        return list(self._battletags.values())
+
+    def close(self) -> None:
+        self.webhooks.close()
+
+    def _key(self, battletag: str) -> str:
+        if battletag == ALL_PLAYERS:
+            return battletag
+        return self.client.format_battletag(battletag).lower()
+
+    def subscribe(self, battletag: str, subscriber: Subscriber) -> None:
+        """
+        Subscribes a webhook URL or queue to a player's changes
+
+        Parameters
+        ----------
+        battletag : str
+          The player's battletag (ALL_PLAYERS for every player)
+        subscriber : Union[str, asyncio.Queue]
+          A webhook URL to POST events to, or a queue to put them on
+        """
+        if battletag != ALL_PLAYERS and not self.client.battle_tag_check(battletag):
+            raise InvalidBattletag("Invalid battletag")
+        key = self._key(battletag)
+        self._subscribers.setdefault(key, set()).add(subscriber)
+        if key != ALL_PLAYERS:
+            self._battletags.setdefault(key, battletag)
+
+    def unsubscribe(self, battletag: str, subscriber: Subscriber) -> None:
+        """
+        Removes a subscription, dropping the player once nobody listens to it
+
+        Parameters
+        ----------
+        battletag : str
+          The player's battletag
+        subscriber : Union[str, asyncio.Queue]
+          The webhook URL or queue
+        """
+        key = self._key(battletag)
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[key]
+            self._battletags.pop(key, None)
+            self._summaries.pop(key, None)
+
+    async def events(self, battletag: str = ALL_PLAYERS) -> AsyncIterator[RankChange]:
+        """
+        Yields the changes of a player (or of every watched player)
+
+        Parameters
+        ----------
+        battletag : str
+          default: ALL_PLAYERS
+          The player's battletag
+
+        returns
+        -------
+        AsyncIterator[RankChange]
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribe(battletag, queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(battletag, queue)
+
+    async def refresh(self, battletag: str, semaphore: asyncio.Semaphore) -> None:
+        """
+        Fetches a player's summary once and notifies its subscribers of changes
+
+        Parameters
+        ----------
+        battletag : str
+          The player's battletag
+        semaphore : asyncio.Semaphore
+          Bounds the number of concurrent fetches
+        """
+        async with semaphore:
+            try:
+                summary = await asyncio.to_thread(
+                    self.client.player_summary, battletag
+                )
+            except Exception:
+                # One bad player must not stop the refresh of the others
+                logger.exception("Could not refresh %s", battletag)
+                return
+
+        key = self._key(battletag)
+        previous = self._summaries.get(key)
+        if key not in self._subscribers:
+            return
+        self._summaries[key] = summary
+        if previous is None:
+            return
+
+        try:
+            events = changes(battletag, previous, summary)
+        except Exception:
+            logger.exception("Could not compare summaries of %s", battletag)
+            return
+        for event in events:
+            await self.publish(event)
+
+    async def publish(self, event: RankChange) -> None:
+        """
+        Delivers an event to the subscribers of its player and of every player
+
+        Parameters
+        ----------
+        event : RankChange
+          The event
+        """
+        subscribers = set(self._subscribers.get(self._key(event.battletag), ()))
+        subscribers |= self._subscribers.get(ALL_PLAYERS, set())
+        webhooks = []
+        for subscriber in subscribers:
+            if isinstance(subscriber, asyncio.Queue):
+                try:
+                    subscriber.put_nowait(event)
+                except asyncio.QueueFull:
+                    # A consumer that stopped reading must not grow without bound
+                    logger.warning("Queue full, dropping event: %s", event)
+            else:
+                webhooks.append(self.post(subscriber, event))
+        await asyncio.gather(*webhooks)
+
+    async def post(self, url: str, event: RankChange) -> None:
+        """
+        POSTs an event to a webhook as JSON
+
+        Parameters
+        ----------
+        url : str
+          The webhook URL
+        event : RankChange
+          The event
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.webhooks.post,
+                url,
+                json=event.to_dict(),
+                timeout=self.client.timeout,
+            )
+        except Exception as error:
+            logger.warning("Could not deliver to %s: %s", url, error)
+            return
+        if response.status_code >= 400:
+            logger.warning("Webhook %s answered %s", url, response.status_code)
+
+    async def run_once(self) -> None:
+        """
+        Refreshes every watched player once
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(self.refresh(battletag, semaphore) for battletag in self.battletags)
+        )
+
+    async def run(self) -> None:
+        """
+        Refreshes every watched player each interval until cancelled
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await self.run_once()
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+
+async def _print_events(queue: asyncio.Queue) -> None:
+    while True:
+        event = await queue.get()
+        print(json.dumps(event.to_dict()), flush=True)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    watcher = Watcher(interval=args.interval, concurrency=args.concurrency)
+    subscriptions: List[Tuple[str, Optional[str]]] = [
+        (battletag, None) for battletag in args.battletags
+    ]
+    if args.subscriptions:
+        with open(args.subscriptions, encoding="utf-8") as file:
+            for line in file:
+                fields = line.split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                webhook = fields[1] if len(fields) > 1 else None
+                subscriptions.append((fields[0], webhook))
+
+    # Events of players without a webhook are printed to stdout
+    stdout: asyncio.Queue = asyncio.Queue(maxsize=watcher.queue_size)
+    for battletag, webhook in subscriptions:
+        urls = [webhook] if webhook else args.webhook
+        for url in urls or [stdout]:
+            watcher.subscribe(battletag, url)
+
+    logger.info("Watching %s players", len(watcher))
+    try:
+        await asyncio.gather(watcher.run(), _print_events(stdout))
+    finally:
+        watcher.close()
+        watcher.client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m overwatchpy.watch",
+        description="Watch players for rank and endorsement changes",
+    )
+    parser.add_argument("battletags", nargs="*", help="Battletags to watch")
+    parser.add_argument(
+        "--subscriptions",
+        help="File with one 'battletag [webhook]' subscription per line",
+    )
+    parser.add_argument(
+        "--webhook",
+        action="append",
+        default=[],
+        help="Webhook URL to POST events to (default: print them to stdout)",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=300, help="Seconds between refreshes"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Concurrent fetches"
+    )
+    args = parser.parse_args(argv)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(logging.INFO)
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
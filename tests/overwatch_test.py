@@ -1 +1,616 @@
-# write these
+import asyncio
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from overwatchpy.api import HEDGE_MIN_SAMPLES, Client
+from overwatchpy.core import Overwatch
+from overwatchpy.errors import DeadlineExceeded, InvalidLocale, OverwatchAPIError
+from overwatchpy.leaderboard import Leaderboard, SortedList
+from overwatchpy.locales import LocalizedData, Translated, merge_locale, split_locales
+from overwatchpy.objects import (
+    OverwatchPlayerSearch,
+    OverwatchPlayerStats,
+    PlayerProfileSummary,
+)
+from overwatchpy.search import PlayerSearchIndex
+from overwatchpy.transport import read_recording
+from overwatchpy.watch import ALL_PLAYERS, RankChange, Watcher, changes
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves the behaviours the tests need, selected by path
+    """
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, status: int = 200, body: bytes = b"{}") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+
+        if self.path == "/ok":
+            self.reply()
+        elif self.path == "/hang":
+            time.sleep(10)
+            self.reply()
+        elif self.path == "/trickle":
+            # Each byte arrives well within any socket timeout
+            body = b'{"padding": "' + b"x" * 40 + b'"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for byte in body:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.2)
+        elif self.path == "/unavailable-then-hang":
+            if hits == 1:
+                self.reply(503)
+            else:
+                time.sleep(10)
+                self.reply()
+        elif self.path == "/unavailable-twice":
+            if hits <= 2:
+                self.reply(503, b'{"error": "unavailable"}')
+            else:
+                self.reply(body=b'{"hits": %d}' % hits)
+        elif self.path == "/slow-first":
+            if hits == 1:
+                time.sleep(3)
+            self.reply(body=b'{"hits": %d}' % hits)
+        else:
+            self.reply(404)
+
+
+class LocalServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.hits = {}
+        self.server.lock = threading.Lock()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.base = "http://127.0.0.1:%s" % self.server.server_address[1]
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+
+class DeadlineTest(LocalServerTest):
+    def assertDeadline(self, client: Client, path: str, timeout: float) -> None:
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            client.request(self.url(path), timeout=timeout)
+        self.assertLess(time.monotonic() - started, timeout + 0.5)
+
+    def test_hanging_response(self) -> None:
+        client = Client()
+        self.assertDeadline(client, "/hang", 1)
+        client.close()
+
+    def test_trickled_body(self) -> None:
+        client = Client()
+        self.assertDeadline(client, "/trickle", 1)
+        client.close()
+
+    def test_trickled_undecoded_body(self) -> None:
+        client = Client()
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            client.request(self.url("/trickle"), timeout=1, decode_content=False)
+        self.assertLess(time.monotonic() - started, 1.5)
+        client.close()
+
+    def test_retry_gets_the_time_left(self) -> None:
+        client = Client()
+        self.assertDeadline(client, "/unavailable-then-hang", 2)
+        self.assertEqual(self.server.hits["/unavailable-then-hang"], 2)
+        client.close()
+
+    def test_fast_response(self) -> None:
+        client = Client()
+        self.assertEqual(client.request(self.url("/ok"), timeout=1), {})
+        client.close()
+
+
+class HedgeTest(LocalServerTest):
+    def test_hedged_request_wins(self) -> None:
+        client = Client(hedge=True)
+        client._latencies.extend([0.05] * HEDGE_MIN_SAMPLES)
+        started = time.monotonic()
+        response = client.request(self.url("/slow-first"), timeout=5)
+        self.assertEqual(response, {"hits": 2})
+        self.assertLess(time.monotonic() - started, 2)
+        client.close()
+
+    def test_not_hedged_without_samples(self) -> None:
+        client = Client(hedge=True)
+        self.assertIsNone(client.hedge_delay())
+        self.assertEqual(client.request(self.url("/ok")), {})
+        self.assertEqual(self.server.hits["/ok"], 1)
+        client.close()
+
+    def test_hedged_deadline(self) -> None:
+        client = Client(hedge=True)
+        client._latencies.extend([0.05] * HEDGE_MIN_SAMPLES)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            client.request(self.url("/hang"), timeout=1)
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(self.server.hits["/hang"], 2)
+        client.close()
+
+
+class RecordReplayTest(LocalServerTest):
+    def setUp(self) -> None:
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "recording.jsonl.gz")
+
+    def client(self, **kwargs) -> Client:
+        client = Client(**kwargs)
+        adapter = client.session.get_adapter(self.base)
+        adapter.retries = adapter.retries.new(backoff_factor=0)
+        self.addCleanup(client.close)
+        return client
+
+    def test_round_trip_with_retries(self) -> None:
+        recorder = self.client(record=self.path)
+        url = self.url("/unavailable-twice")
+        self.assertEqual(recorder.request(url), {"hits": 3})
+        recorder.close()
+        entries = list(read_recording(self.path))
+        self.assertEqual([entry["status"] for entry in entries], [503, 503, 200])
+
+        replayer = self.client(replay=self.path, replay_speed=0)
+        self.assertEqual(replayer.request(url), {"hits": 3})
+        self.assertEqual(self.server.hits[url[len(self.base) :]], 3)
+
+    def test_replay_without_retries_returns_the_error(self) -> None:
+        recorder = self.client(record=self.path)
+        recorder.request(self.url("/unavailable-twice"))
+        recorder.close()
+        replayer = self.client(replay=self.path, replay_speed=0, use_retry=False)
+        with self.assertRaises(OverwatchAPIError) as raised:
+            replayer.request(self.url("/unavailable-twice"))
+        self.assertEqual(raised.exception.args[0], 503)
+
+    def test_appended_runs_play_back_to_back(self) -> None:
+        for _ in range(2):
+            recorder = self.client(record=self.path)
+            recorder.request(self.url("/ok"))
+            time.sleep(0.1)
+            recorder.close()
+        first, second = read_recording(self.path)
+        self.assertGreaterEqual(second["offset"], first["offset"] + first["elapsed"])
+
+    def test_replay_honours_the_deadline(self) -> None:
+        url = self.url("/ok")
+        with gzip.open(self.path, "wt", encoding="utf-8") as log:
+            entry = {"offset": 0, "method": "GET", "url": url, "elapsed": 5}
+            entry.update(status=200, headers={}, body="e30=")
+            log.write(json.dumps(entry) + "\n")
+        replayer = self.client(replay=self.path)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            replayer.request(url, timeout=0.5)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.client(replay=self.path, replay_speed=0).request(url), {})
+
+    def test_record_and_replay_together(self) -> None:
+        with self.assertRaises(ValueError):
+            Client(record=self.path, replay=self.path)
+
+
+def player(name: str, player_id: str = None) -> dict:
+    return {"player_id": player_id or name.replace("#", "-"), "name": name}
+
+
+def players(*names: str) -> OverwatchPlayerSearch:
+    results = [player(name) for name in names]
+    return OverwatchPlayerSearch(total=len(results), results=results)
+
+
+class PlayerSearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 1000.0
+        patcher = mock.patch(
+            "overwatchpy.search.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = PlayerSearchIndex(ttl=300)
+
+    def names(self, *args, **kwargs) -> list:
+        search = self.index.search(*args, **kwargs)
+        return [result["name"] for result in search.results]
+
+    def test_covers_prefixes_of_complete_searches(self) -> None:
+        self.index.add("twi", players("Twizy#1234"), "quickplay", "pc", "public")
+        self.assertTrue(self.index.covers("twizy", "quickplay", "pc", "public"))
+        self.assertTrue(self.index.covers("Twizy#12", "quickplay", "pc", "public"))
+        self.assertFalse(self.index.covers("tw", "quickplay", "pc", "public"))
+        self.assertFalse(self.index.covers("twizy", "competitive", "pc", "public"))
+
+    def test_incomplete_search_does_not_cover(self) -> None:
+        self.index.add(
+            "twi", players("Twizy#1234"), "quickplay", "pc", "public", complete=False
+        )
+        self.assertFalse(self.index.covers("twizy", "quickplay", "pc", "public"))
+        self.assertEqual(self.names("twi"), ["Twizy#1234"])
+
+    def test_search_by_prefix_and_battletag(self) -> None:
+        search = players("Twizy#1234", "TeKrop#2217", "Ana#1")
+        self.index.add("t", search, "quickplay", "pc", "public")
+        self.assertEqual(self.names("t"), ["TeKrop#2217", "Twizy#1234"])
+        self.assertEqual(self.names("twizy-12"), ["Twizy#1234"])
+        self.assertEqual(self.names("TWIZY#1234"), ["Twizy#1234"])
+        self.assertEqual(
+            self.names("t", order_by="name:desc"), ["Twizy#1234", "TeKrop#2217"]
+        )
+        self.assertEqual(self.names("t", limit=1), ["TeKrop#2217"])
+        self.assertEqual(self.index.search("t", limit=1).total, 2)
+
+    def test_search_by_gamemode(self) -> None:
+        self.index.add("a", players("Ana#1"), "quickplay", "pc", "public")
+        self.index.add("b", players("Bob#1"), "competitive", "pc", "public")
+        self.assertEqual(self.names("", gamemode="quickplay"), ["Ana#1"])
+        self.assertEqual(self.names("", gamemode="competitive"), ["Bob#1"])
+        self.assertEqual(self.names("", platform="console"), [])
+
+    def test_rename(self) -> None:
+        self.index.add("a", players("Ana#1"), "quickplay", "pc", "public")
+        renamed = OverwatchPlayerSearch(total=1, results=[player("Zen#1", "Ana-1")])
+        self.index.add("z", renamed, "quickplay", "pc", "public")
+        self.assertEqual(self.names("a"), [])
+        self.assertEqual(self.names("z"), ["Zen#1"])
+        self.assertEqual(len(self.index), 1)
+
+    def test_prune(self) -> None:
+        self.index.add("a", players("Ana#1"), "quickplay", "pc", "public")
+        self.now += 200
+        self.index.add("a", players("Ana#1"), "competitive", "pc", "public")
+        self.now += 200
+        self.assertFalse(self.index.covers("ana", "quickplay", "pc", "public"))
+        self.assertTrue(self.index.covers("ana", "competitive", "pc", "public"))
+        self.assertEqual(self.names("a", gamemode="quickplay"), [])
+        self.index.prune()
+        self.assertEqual(self.names("a"), ["Ana#1"])
+        self.now += 200
+        self.index.prune()
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.names("a"), [])
+
+
+class SortedListTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.entries = SortedList()
+        self.entries.LOAD = 4
+        self.expected = []
+
+    def check(self) -> None:
+        self.assertEqual(list(self.entries), self.expected)
+        self.assertEqual(list(reversed(self.entries)), self.expected[::-1])
+        self.assertEqual(len(self.entries), len(self.expected))
+        for bucket, maximum in zip(self.entries._buckets, self.entries._maxes):
+            self.assertTrue(0 < len(bucket) <= 2 * self.entries.LOAD)
+            self.assertEqual(bucket[-1], maximum)
+        for position, entry in enumerate(self.expected):
+            self.assertEqual(self.entries[position], entry)
+
+    def test_add_splits_buckets(self) -> None:
+        rng = random.Random(0)
+        for number in range(100):
+            entry = (rng.randint(0, 20), "player%d" % number)
+            self.entries.add(entry)
+            self.expected.append(entry)
+        self.expected.sort()
+        self.assertGreater(len(self.entries._buckets), 100 // 8)
+        self.check()
+        self.assertEqual(self.entries[-1], self.expected[-1])
+        with self.assertRaises(IndexError):
+            self.entries[100]
+
+    def test_remove_drops_empty_buckets(self) -> None:
+        rng = random.Random(1)
+        for number in range(50):
+            self.entries.add((float(number), "player%d" % number))
+            self.expected.append((float(number), "player%d" % number))
+        for entry in rng.sample(self.expected, 40):
+            self.entries.remove(entry)
+            self.expected.remove(entry)
+            self.check()
+        for entry in list(self.expected):
+            self.entries.remove(entry)
+            self.expected.remove(entry)
+        self.check()
+        self.assertEqual(self.entries._buckets, [])
+
+    def test_count_at_or_below(self) -> None:
+        for number in range(30):
+            self.entries.add((float(number % 10), "player%d" % number))
+        self.assertEqual(self.entries.count_at_or_below(-1), 0)
+        self.assertEqual(self.entries.count_at_or_below(0), 3)
+        self.assertEqual(self.entries.count_at_or_below(4.5), 15)
+        self.assertEqual(self.entries.count_at_or_below(9), 30)
+
+
+def player_stats(winrate: float) -> OverwatchPlayerStats:
+    entry = {
+        "average": {},
+        "games_lost": 1,
+        "games_played": 2,
+        "games_won": 1,
+        "kda": 1.5,
+        "time_played": 600,
+        "total": {},
+        "winrate": winrate,
+    }
+    return OverwatchPlayerStats(
+        {"general": entry, "heroes": {"ana": entry}, "roles": {"support": entry}}
+    )
+
+
+class LeaderboardTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = Leaderboard()
+        for number, winrate in enumerate([10, 50, 30, 40, 20]):
+            self.board.update(
+                "Player#%d" % number, player_stats(winrate), "competitive", "pc"
+            )
+        self.competitive = {"gamemode": "competitive", "platform": "pc"}
+        self.quickplay = {"gamemode": "quickplay", "platform": "pc"}
+
+    def test_top(self) -> None:
+        self.assertEqual(
+            self.board.top("winrate", hero="ana", limit=3, **self.competitive),
+            [("player-1", 50), ("player-3", 40), ("player-2", 30)],
+        )
+        top = self.board.top("winrate", role="support", **self.quickplay)
+        self.assertEqual(top, [])
+
+    def test_percentile_and_value_at(self) -> None:
+        board, facet = self.board, self.competitive
+        percentile = board.percentile("PLAYER#2", "winrate", hero="ana", **facet)
+        self.assertEqual(percentile, 60)
+        percentile = board.percentile("player-1", "kda", role="support", **facet)
+        self.assertEqual(percentile, 100)
+        self.assertIsNone(board.percentile("nobody", "winrate", hero="ana", **facet))
+        self.assertEqual(board.value_at(0, "winrate", hero="ana", **facet), 10)
+        self.assertEqual(board.value_at(50, "winrate", hero="ana", **facet), 30)
+        self.assertEqual(board.value_at(100, "winrate", hero="ana", **facet), 50)
+        self.assertIsNone(board.value_at(50, "winrate", hero="mercy", **facet))
+
+    def test_gamemodes_are_kept_apart(self) -> None:
+        board = self.board
+        board.update("Player#1", player_stats(90), "quickplay", "pc")
+        self.assertEqual(
+            board.top("winrate", hero="ana", **self.quickplay), [("player-1", 90)]
+        )
+        self.assertEqual(
+            board.top("winrate", hero="ana", limit=1, **self.competitive),
+            [("player-1", 50)],
+        )
+        self.assertEqual(len(board), 5)
+
+        board.remove("Player#1", gamemode="quickplay")
+        self.assertEqual(board.top("winrate", hero="ana", **self.quickplay), [])
+        self.assertIn("player#1", board)
+        board.remove("Player#1")
+        self.assertNotIn("player#1", board)
+        self.assertEqual(len(board), 4)
+
+    def test_refresh_replaces_values(self) -> None:
+        self.board.update("Player#0", player_stats(99), "competitive", "pc")
+        top = self.board.top("winrate", hero="ana", **self.competitive)
+        self.assertEqual(top[0], ("player-0", 99))
+        self.assertEqual(len(top), 5)
+
+    def test_facet_is_required(self) -> None:
+        with self.assertRaises(ValueError):
+            self.board.top("winrate", hero="ana")
+        with self.assertRaises(ValueError):
+            self.board.update("Player#9", player_stats(1))
+        restricted = Leaderboard(gamemode="competitive", platform="pc")
+        restricted.update("Player#0", player_stats(10), "quickplay", "pc")
+        restricted.update("Player#1", player_stats(20))
+        self.assertEqual(restricted.top("winrate", hero="ana"), [("player-1", 20)])
+
+HEROES = {
+    "en-us": [
+        {
+            "key": "ana",
+            "name": "Ana",
+            "portrait": "https://example.com/ana.png",
+            "hitpoints": {"health": 250, "armor": 0},
+            "abilities": [{"name": "Biotic Rifle", "icon": "rifle.png"}],
+            "story": {"chapters": ["One", "Two"]},
+        }
+    ],
+    "fr-fr": [
+        {
+            "key": "ana",
+            "name": "Ana",
+            "portrait": "https://example.com/ana.png",
+            "hitpoints": {"health": 250, "armor": 0},
+            "abilities": [{"name": "Fusil biotique", "icon": "rifle.png"}],
+            "story": {"chapters": ["Un", "Deux", "Trois"]},
+        }
+    ],
+}
+
+
+class LocalesTest(unittest.TestCase):
+    def test_split_keeps_invariant_values_once(self) -> None:
+        texts = [[], []]
+        shared = split_locales(list(HEROES.values()), texts)
+        hero = shared[0]
+        self.assertEqual(hero["portrait"], "https://example.com/ana.png")
+        self.assertEqual(hero["hitpoints"], {"health": 250, "armor": 0})
+        self.assertEqual(hero["abilities"][0]["icon"], "rifle.png")
+        self.assertIsInstance(hero["abilities"][0]["name"], Translated)
+        # Lists of different lengths are translated as a whole
+        self.assertIsInstance(hero["story"]["chapters"], Translated)
+        self.assertEqual(texts[0], ["Biotic Rifle", ["One", "Two"]])
+        self.assertEqual(texts[1], ["Fusil biotique", ["Un", "Deux", "Trois"]])
+
+    def test_merge_rebuilds_every_locale(self) -> None:
+        texts = [[], []]
+        shared = split_locales(list(HEROES.values()), texts)
+        for locale_texts, payload in zip(texts, HEROES.values()):
+            self.assertEqual(merge_locale(shared, locale_texts), payload)
+
+    def test_identical_payloads_are_shared(self) -> None:
+        texts = [[], []]
+        payload = HEROES["en-us"]
+        self.assertIs(split_locales([payload, payload], texts), payload)
+        self.assertEqual(texts, [[], []])
+
+    def test_localized_data(self) -> None:
+        data = LocalizedData(HEROES, lambda payload: payload[0]["abilities"][0])
+        self.assertEqual(len(data), 2)
+        self.assertIn("fr-fr", data)
+        self.assertNotIn("de-de", data)
+        self.assertEqual(list(data), ["en-us", "fr-fr"])
+        self.assertEqual(data["fr-fr"]["name"], "Fusil biotique")
+        self.assertEqual(data.get("en-us")["name"], "Biotic Rifle")
+
+    def test_unsupported_locales_are_rejected(self) -> None:
+        client = Overwatch()
+        self.addCleanup(client.close)
+        with self.assertRaises(InvalidLocale):
+            client.heroes_all_locales(locales=["en-us", "xx-xx"])
+        with self.assertRaises(InvalidLocale):
+            client.heroes_all_locales(locales=[])
+
+
+def summary(competitive: dict, level: int = 1) -> PlayerProfileSummary:
+    return PlayerProfileSummary(
+        username="Player",
+        avatar=None,
+        namecard=None,
+        title=None,
+        endorsement={"level": level, "frame": None},
+        competitive=competitive,
+        privacy="public",
+    )
+
+
+def rank(division: str, tier: int) -> dict:
+    return {"division": division, "tier": tier, "role_icon": None}
+
+
+class ChangesTest(unittest.TestCase):
+    def test_no_changes(self) -> None:
+        old = summary({"pc": {"tank": rank("gold", 3), "season": 9}})
+        new = summary({"pc": {"tank": rank("gold", 3), "season": 9}})
+        self.assertEqual(changes("Player#1", old, new), [])
+
+    def test_rank_and_endorsement_changes(self) -> None:
+        old = summary({"pc": {"tank": rank("gold", 3), "damage": None}}, level=2)
+        new = summary(
+            {"pc": {"tank": rank("gold", 2), "damage": rank("silver", 1)}}, level=3
+        )
+        events = [event.to_dict() for event in changes("Player#1", old, new)]
+        self.assertEqual(
+            events,
+            [
+                {
+                    "battletag": "Player#1",
+                    "kind": "competitive",
+                    "platform": "pc",
+                    "role": "damage",
+                    "old": None,
+                    "new": {"division": "silver", "tier": 1},
+                },
+                {
+                    "battletag": "Player#1",
+                    "kind": "competitive",
+                    "platform": "pc",
+                    "role": "tank",
+                    "old": {"division": "gold", "tier": 3},
+                    "new": {"division": "gold", "tier": 2},
+                },
+                {
+                    "battletag": "Player#1",
+                    "kind": "endorsement",
+                    "platform": None,
+                    "role": None,
+                    "old": 2,
+                    "new": 3,
+                },
+            ],
+        )
+
+    def test_private_profile(self) -> None:
+        old = summary({"console": {"support": rank("master", 5)}})
+        new = summary(None)
+        [event] = changes("Player#1", old, new)
+        self.assertEqual(
+            (event.platform, event.role, event.new), ("console", "support", None)
+        )
+
+
+class WatcherTest(unittest.TestCase):
+    def test_full_queues_drop_events(self) -> None:
+        async def run() -> None:
+            watcher = Watcher(client=Overwatch(), queue_size=2)
+            self.addCleanup(watcher.client.close)
+            self.addCleanup(watcher.close)
+            events = watcher.events("Player#1234")
+            first = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0)
+            [queue] = watcher._subscribers["player-1234"]
+            self.assertEqual(queue.maxsize, 2)
+
+            for level in range(4):
+                event = RankChange("Player#1234", "endorsement", 0, level)
+                await watcher.publish(event)
+            self.assertEqual((await first).new, 0)
+            self.assertEqual((await events.__anext__()).new, 1)
+            self.assertTrue(queue.empty())
+            await events.aclose()
+            self.assertNotIn("player-1234", watcher._subscribers)
+
+        with self.assertLogs("overwatchpy.watch", "WARNING"):
+            asyncio.run(run())
+
+    def test_subscriptions_are_shared(self) -> None:
+        watcher = Watcher(client=Overwatch())
+        self.addCleanup(watcher.client.close)
+        self.addCleanup(watcher.close)
+        watcher.subscribe("Player#1234", "https://example.com/a")
+        watcher.subscribe("player#1234", "https://example.com/b")
+        watcher.subscribe(ALL_PLAYERS, "https://example.com/c")
+        self.assertEqual(watcher.battletags, ["Player#1234"])
+        watcher.unsubscribe("PLAYER#1234", "https://example.com/a")
+        self.assertEqual(len(watcher), 1)
+        watcher.unsubscribe("Player#1234", "https://example.com/b")
+        self.assertEqual(len(watcher), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()